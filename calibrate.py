@@ -10,10 +10,25 @@ import time
 import argparse
 from pupil_labs.realtime_api.simple import discover_one_device
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 CAMERA_FILE = "scene_camera.json"
 CALIB_FILE = "calibration.json"
 SAMPLES_PER_POINT = 30
 SAMPLE_INTERVAL = 0.01
+RECEIVE_TIMEOUT = 0.05
+LUT_STEP = 4  # px between undistortion LUT nodes; bilinear error stays < 0.1 px
+
+
+def read_json(path):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
 
 
 def run_calibration(display_index=1):
@@ -21,24 +36,54 @@ def run_calibration(display_index=1):
     # CAMERA PARAMS
     # --------------------------
     def load_camera_params():
-        with open(CAMERA_FILE, "r") as f:
-            data = json.load(f)
-        cam_matrix = np.array(data["camera_matrix"], dtype=np.float32)
-        dist_coeffs = np.array(data["distortion_coefficients"], dtype=np.float32)
+        data = read_json(CAMERA_FILE)
+        cam_matrix = np.asarray(data["camera_matrix"], dtype=np.float32)
+        dist_coeffs = np.asarray(data["distortion_coefficients"], dtype=np.float32)
+        cam_matrix.setflags(write=False)
+        dist_coeffs.setflags(write=False)
         resolution = (1600, 1200)  # hard-coded scene camera resolution
         return cam_matrix, dist_coeffs, resolution
 
     CAM_MATRIX, DIST_COEFFS, RESOLUTION = load_camera_params()
 
-    def undistort_point(x, y):
-        pts = np.array([[[x, y]]], dtype=np.float32)
-        undistorted = cv2.undistortPoints(pts, CAM_MATRIX, DIST_COEFFS)
-        u, v = undistorted[0][0]
-        fx, fy = CAM_MATRIX[0, 0], CAM_MATRIX[1, 1]
-        cx, cy = CAM_MATRIX[0, 2], CAM_MATRIX[1, 2]
-        px = u * fx + cx
-        py = v * fy + cy
-        return px, py
+    def build_undistort_lut():
+        # undistort a LUT_STEP-spaced grid over the scene camera once (edges
+        # included); per-sample lookups then become a bilinear read instead
+        # of an iterative solve
+        w, h = RESOLUTION
+        xs, ys = np.meshgrid(
+            np.arange(0, w + LUT_STEP, LUT_STEP, dtype=np.float32),
+            np.arange(0, h + LUT_STEP, LUT_STEP, dtype=np.float32),
+        )
+        grid = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2)
+        undistorted = cv2.undistortPoints(grid, CAM_MATRIX, DIST_COEFFS, P=CAM_MATRIX)
+        undistorted = undistorted.reshape(xs.shape + (2,))
+        px_map = np.ascontiguousarray(undistorted[..., 0], dtype=np.float32)
+        py_map = np.ascontiguousarray(undistorted[..., 1], dtype=np.float32)
+        return px_map, py_map
+
+    PX_MAP, PY_MAP = build_undistort_lut()
+
+    # raw gaze samples for one calibration point are written in place here
+    SAMPLE_BUF = np.empty((SAMPLES_PER_POINT, 2), dtype=np.float32)
+
+    def bilinear(lut, ix, iy, dx, dy):
+        top = lut[iy, ix] * (1 - dx) + lut[iy, ix + 1] * dx
+        bottom = lut[iy + 1, ix] * (1 - dx) + lut[iy + 1, ix + 1] * dx
+        return top * (1 - dy) + bottom * dy
+
+    def undistort_points(raw):
+        # raw: (N, 2) distorted scene-camera pixels -> (N, 2) undistorted
+        w, h = RESOLUTION
+        pts = np.asarray(raw, dtype=np.float32).reshape(-1, 2)
+        x = np.clip(pts[:, 0], 0.0, w - 1.0) / LUT_STEP
+        y = np.clip(pts[:, 1], 0.0, h - 1.0) / LUT_STEP
+        ix = np.minimum(x.astype(np.intp), PX_MAP.shape[1] - 2)
+        iy = np.minimum(y.astype(np.intp), PX_MAP.shape[0] - 2)
+        dx, dy = x - ix, y - iy
+        px = bilinear(PX_MAP, ix, iy, dx, dy)
+        py = bilinear(PY_MAP, ix, iy, dx, dy)
+        return np.stack([px, py], axis=1)
 
     # --------------------------
     # PYGAME SETUP
@@ -71,6 +116,34 @@ def run_calibration(display_index=1):
     NUM_POINTS = len(calibration_points)
     captured_points = [None] * NUM_POINTS
 
+    # fixed-size dots, rasterized once and blitted centered
+    def make_dot(color, radius, width=0):
+        dot = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+        pygame.draw.circle(dot, color, (radius, radius), radius, width)
+        return dot.convert_alpha()
+
+    target_dot = make_dot(RED, 20)
+    gaze_dot = make_dot(GREEN, 15)
+    gaze_ring = make_dot(GREEN, 15, 2)
+    edit_dot = make_dot(CYAN, 10)
+
+    def blit_dot(dot, center):
+        return screen.blit(dot, dot.get_rect(center=center))
+
+    # backgrounds the loop restores under last frame's drawing
+    blank_bg = pygame.Surface((WIDTH, HEIGHT)).convert()
+    blank_bg.fill(BLACK)
+
+    # static part of the replay screen, rendered once
+    replay_bg = pygame.Surface((WIDTH, HEIGHT)).convert()
+    replay_bg.fill(BLACK)
+    for i, (sx, sy) in enumerate(calibration_points):
+        replay_bg.blit(target_dot, target_dot.get_rect(center=(sx, sy)))
+        label = font.render(str(i + 1), True, WHITE)
+        replay_bg.blit(label, label.get_rect(center=(sx, sy)))
+    msg = font.render("1-5=redo, SHIFT+1-5=manual edit, ESC=finish", True, WHITE)
+    replay_bg.blit(msg, (50, 50))
+
     # init screen
     screen.fill(BLACK)
     msg = font.render("Initializing... Please wait", True, WHITE)
@@ -106,17 +179,28 @@ def run_calibration(display_index=1):
     # --------------------------
     def recompute_homography():
         nonlocal homography
-        pts = [p for p in captured_points if p is not None]
+        valid_i = [i for i, p in enumerate(captured_points) if p is not None]
+        pts = [captured_points[i] for i in valid_i]
         if len(pts) >= 4:
             src = np.array([p["gaze"] for p in pts], dtype=np.float32)
             dst = np.array(
                 [p["adjusted"] if p["adjusted"] is not None else p["screen"] for p in pts],
                 dtype=np.float32,
             )
+            # same fit eye_laser_game.load_homography applies to the saved
+            # points, so the replay shows the mapping the game will use
             homography, _ = cv2.findHomography(src, dst, method=0)
         else:
             homography = None
 
+        # mapped gaze per calibration point, NaN where there is nothing to show
+        mapped_full[:] = np.nan
+        if homography is not None:
+            gaze_coords = src.reshape(-1, 1, 2)
+            mapped_full[valid_i] = cv2.perspectiveTransform(
+                gaze_coords, homography
+            ).reshape(-1, 2)
+
     # --------------------------
     # MAIN LOOP
     # --------------------------
@@ -124,61 +208,16 @@ def run_calibration(display_index=1):
     redo_index = None
     manual_edit_index = None
     homography = None
+    mapped_full = np.full((NUM_POINTS, 2), np.nan, dtype=np.float32)
     running = True
+    # only regions drawn last frame are repainted and pushed to the display;
+    # a phase change repaints everything
+    drawn_phase = None
+    dirty_rects = []
 
     while running:
-        screen.fill(BLACK)
-
-        if phase == "init":
-            msg = font.render("Initializing... Please wait", True, WHITE)
-            screen.blit(msg, (WIDTH // 2 - 200, HEIGHT // 2))
-
-            gaze = device.receive_gaze_datum()
-            if gaze:
-                samples_collected += 1
-
-            if (time.time() - warmup_start > warmup_duration) or (
-                samples_collected >= warmup_samples
-            ):
-                print("Warm-up finished. Starting calibration.")
-                phase = "capture"
-                current_index = 0
-
-        elif phase == "capture":
-            idx = redo_index if redo_index is not None else current_index
-            cx, cy = calibration_points[idx]
-            pygame.draw.circle(screen, RED, (cx, cy), 20)
-            msg = font.render("Please look at the dot.", True, WHITE)
-            screen.blit(msg, (50, 50))
-
-        elif phase == "replay":
-            for i, screen_pt in enumerate(calibration_points):
-                sx, sy = screen_pt
-                pygame.draw.circle(screen, RED, (sx, sy), 20)
-
-                if captured_points[i] is not None and homography is not None:
-                    gaze_pt = np.array([[[*captured_points[i]["gaze"]]]], dtype=np.float32)
-                    mapped_pt = cv2.perspectiveTransform(gaze_pt, homography)[0][0]
-                    gx, gy = mapped_pt
-                    pygame.draw.circle(screen, GREEN, (int(gx), int(gy)), 15)
-
-            print("Replay mode: 1-5=redo, SHIFT+1-5=manual edit, ESC=finish")
-
-        elif phase == "manual_edit":
-            idx = manual_edit_index
-            sx, sy = calibration_points[idx]
-            gx, gy = captured_points[idx]["adjusted"]
-
-            pygame.draw.circle(screen, RED, (sx, sy), 20)
-            pygame.draw.circle(screen, GREEN, (sx, sy), 15, 2)
-            pygame.draw.circle(screen, CYAN, (int(gx), int(gy)), 10)
-
-        elif phase == "done":
-            msg = font.render("Calibration complete!", True, WHITE)
-            screen.blit(msg, (50, 50))
-            print("Calibration complete! Press ESC to exit.")
-
-        pygame.display.flip()
+        # wait out the frame first so input is read right before drawing
+        clock.tick(60)
 
         # --------------------------
         # EVENT HANDLING
@@ -197,18 +236,20 @@ def run_calibration(display_index=1):
 
                 elif phase == "capture" and event.key == pygame.K_SPACE:
                     idx = redo_index if redo_index is not None else current_index
-                    samples = []
-                    for _ in range(SAMPLES_PER_POINT):
-                        gaze = device.receive_gaze_datum()
+                    n = 0
+                    # read back-to-back and let the stream set the cadence
+                    deadline = time.perf_counter() + SAMPLES_PER_POINT * SAMPLE_INTERVAL
+                    while time.perf_counter() < deadline and n < SAMPLES_PER_POINT:
+                        gaze = device.receive_gaze_datum(timeout_seconds=RECEIVE_TIMEOUT)
                         if gaze and gaze.worn:
-                            gx, gy = undistort_point(gaze.x, gaze.y)
-                            samples.append([gx, gy])
-                        time.sleep(SAMPLE_INTERVAL)
+                            SAMPLE_BUF[n, 0] = gaze.x
+                            SAMPLE_BUF[n, 1] = gaze.y
+                            n += 1
 
-                    print(f"Collected {len(samples)} samples at point {idx+1}")
+                    print(f"Collected {n} samples at point {idx+1}")
 
-                    if len(samples) >= int(SAMPLES_PER_POINT * 0.7):
-                        avg = np.mean(np.array(samples), axis=0)
+                    if n >= int(SAMPLES_PER_POINT * 0.7):
+                        avg = undistort_points(SAMPLE_BUF[:n]).mean(axis=0)
                         cx, cy = calibration_points[idx]
                         gaze = [float(avg[0]), float(avg[1])]
 
@@ -240,17 +281,11 @@ def run_calibration(display_index=1):
                         if idx < NUM_POINTS and captured_points[idx] is not None:
                             if pygame.key.get_mods() & pygame.KMOD_SHIFT:
                                 manual_edit_index = idx
-                                if homography is not None:
-                                    gaze_pt = np.array(
-                                        [[[ *captured_points[idx]["gaze"] ]]],
-                                        dtype=np.float32,
-                                    )
-                                    mapped_pt = cv2.perspectiveTransform(
-                                        gaze_pt, homography
-                                    )[0][0]
+                                mx, my = mapped_full[idx]
+                                if not np.isnan(mx):
                                     captured_points[idx]["adjusted"] = [
-                                        float(mapped_pt[0]),
-                                        float(mapped_pt[1]),
+                                        float(mx),
+                                        float(my),
                                     ]
                                 else:
                                     captured_points[idx]["adjusted"] = captured_points[idx]["screen"][:]
@@ -289,7 +324,59 @@ def run_calibration(display_index=1):
 
                     captured_points[manual_edit_index]["adjusted"] = [gx, gy]
 
-        clock.tick(60)
+        # --------------------------
+        # DRAW
+        # --------------------------
+        background = replay_bg if phase == "replay" else blank_bg
+        if phase != drawn_phase:
+            drawn_phase = phase
+            dirty_rects = [screen.get_rect()]
+        screen.blits([(background, r, r) for r in dirty_rects], doreturn=False)
+        new_rects = []
+
+        if phase == "init":
+            msg = font.render("Initializing... Please wait", True, WHITE)
+            new_rects.append(screen.blit(msg, (WIDTH // 2 - 200, HEIGHT // 2)))
+
+            gaze = device.receive_gaze_datum(timeout_seconds=RECEIVE_TIMEOUT)
+            if gaze:
+                samples_collected += 1
+
+            if (time.time() - warmup_start > warmup_duration) or (
+                samples_collected >= warmup_samples
+            ):
+                print("Warm-up finished. Starting calibration.")
+                phase = "capture"
+                current_index = 0
+
+        elif phase == "capture":
+            idx = redo_index if redo_index is not None else current_index
+            cx, cy = calibration_points[idx]
+            new_rects.append(blit_dot(target_dot, (cx, cy)))
+            msg = font.render("Please look at the dot.", True, WHITE)
+            new_rects.append(screen.blit(msg, (50, 50)))
+
+        elif phase == "replay":
+            new_rects += screen.blits([
+                (gaze_dot, gaze_dot.get_rect(center=(int(gx), int(gy))))
+                for gx, gy in mapped_full if not np.isnan(gx)])
+
+        elif phase == "manual_edit":
+            idx = manual_edit_index
+            sx, sy = calibration_points[idx]
+            gx, gy = captured_points[idx]["adjusted"]
+
+            new_rects.append(blit_dot(target_dot, (sx, sy)))
+            blit_dot(gaze_ring, (sx, sy))
+            new_rects.append(blit_dot(edit_dot, (int(gx), int(gy))))
+
+        elif phase == "done":
+            msg = font.render("Calibration complete!", True, WHITE)
+            new_rects.append(screen.blit(msg, (50, 50)))
+            print("Calibration complete! Press ESC to exit.")
+
+        pygame.display.update(dirty_rects + new_rects)
+        dirty_rects = new_rects
 
     # --------------------------
     # SAVE CALIBRATION
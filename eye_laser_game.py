@@ -3,9 +3,11 @@
 #   python eye_laser_game.py [--timer seconds] [--no-eyetracking] [--no_calibration]
 
 import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
+from pygame._sdl2.sdl2 import error as SDLError
+import math
 import random
 import time
-import math
 import sys
 import os
 import csv
@@ -13,6 +15,9 @@ import json
 import numpy as np
 import cv2
 import subprocess
+import atexit
+import threading
+from dataclasses import dataclass
 
 # Pupil Labs
 try:
@@ -20,17 +25,34 @@ try:
 except ImportError:
     discover_one_device = None
 
+# orjson (optional): faster parsing of the camera/calibration files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Numba (optional): JIT-compiles the per-frame gaze mapping
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda f: f
+
 # --- Settings ---
 ASTEROID_SIZE = 100                # asteroid image size
 FIXATION_HALO_MAX_RADIUS = 20      # max radius of the fixation halo
-FIXATION_TIME = 1.0                 # seconds of gaze to destroy
-LASER_FIXATION_THRESHOLD = 0.02    # seconds (20ms)
+FIXATION_TIME_MS = 1000            # ms of gaze to destroy
+ONLY_BAD_TIMEOUT_MS = 3000         # ms of only bad asteroids before a good one spawns
 MIN_DISTANCE = ASTEROID_SIZE * 2   # minimum distance between asteroids
+MIN_DISTANCE_SQ = MIN_DISTANCE * MIN_DISTANCE
+SPAWN_MAX_TRIES = 30               # random candidates tried before using the grid
 MIN_ASTEROIDS = 1
 MAX_ASTEROIDS = 5
 MAX_ON_SCREEN = 8
 SPAWN_PROBABILITY = 0.5
-ASTEROID_RANDOM_DISAPPEAR_CHANCE = 0.001
+ASTEROID_RANDOM_DISAPPEAR_RATE = 0.06  # per asteroid per second
+LOG_BATCH_ROWS = 64                # buffered log rows that force a write
+LOG_FLUSH_INTERVAL_MS = 1000       # ms between log writes otherwise
 only_bad_start_time = None
 
 # Hard-coded images in visuals folder
@@ -48,22 +70,77 @@ if len(sys.argv) > 2 and sys.argv[1] == '--timer':
     except ValueError:
         GAME_DURATION = None
 
+# --- Scene camera intrinsics ---
+CAMERA_FILE = "scene_camera.json"
+SCENE_RESOLUTION = (1600, 1200)  # hard-coded scene camera resolution
+UNDISTORT_ITERATIONS = 5         # matches cv2.undistortPoints used by calibrate.py
+
+def read_json(path):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+@dataclass(frozen=True)
+class CameraParams:
+    """Scene camera intrinsics; arrays are read-only and shared with the gaze thread."""
+    cam: np.ndarray   # fx, fy, cx, cy
+    dist: np.ndarray  # k1, k2, p1, p2, k3, k4, k5, k6
+
+def load_camera_params():
+    data = read_json(CAMERA_FILE)
+    cam_matrix = np.asarray(data["camera_matrix"], dtype=np.float64)
+    cam = np.array([cam_matrix[0, 0], cam_matrix[1, 1],
+                    cam_matrix[0, 2], cam_matrix[1, 2]])
+    coeffs = np.asarray(data["distortion_coefficients"], dtype=np.float64).ravel()
+    dist = np.zeros(8)
+    dist[:min(len(coeffs), 8)] = coeffs[:8]
+    cam.setflags(write=False)
+    dist.setflags(write=False)
+    return CameraParams(cam=cam, dist=dist)
+
+CAMERA = load_camera_params()
+
+@njit(cache=True)
+def map_gaze(gx, gy, cam, dist, h):
+    """Undistort a scene-camera gaze point and project it through h (flat 3x3)."""
+    fx, fy, cx, cy = cam[0], cam[1], cam[2], cam[3]
+    k1, k2, p1, p2 = dist[0], dist[1], dist[2], dist[3]
+    k3, k4, k5, k6 = dist[4], dist[5], dist[6], dist[7]
+    x0 = (gx - cx) / fx
+    y0 = (gy - cy) / fy
+    x, y = x0, y0
+    for _ in range(UNDISTORT_ITERATIONS):
+        r2 = x * x + y * y
+        icdist = (1 + ((k6 * r2 + k5) * r2 + k4) * r2) / (1 + ((k3 * r2 + k2) * r2 + k1) * r2)
+        delta_x = 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+        delta_y = p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+        x = (x0 - delta_x) * icdist
+        y = (y0 - delta_y) * icdist
+    px = x * fx + cx
+    py = y * fy + cy
+    z = h[6] * px + h[7] * py + h[8]
+    return (h[0] * px + h[1] * py + h[2]) / z, (h[3] * px + h[4] * py + h[5]) / z
+
 # --- Calibration integration ---
 CALIB_FILE = "calibration.json"
 homography = None
+H = None  # homography flattened to 9 float64s for map_gaze
 
 def load_homography():
-    global homography
+    global homography, H
     try:
-        with open(CALIB_FILE, "r") as f:
-            data = json.load(f)
+        data = read_json(CALIB_FILE)
         src = np.array([p["gaze"] for p in data], dtype=np.float32)
         dst = np.array([p["adjusted"] for p in data], dtype=np.float32)
         homography, _ = cv2.findHomography(src, dst, method=0)
+        H = homography.astype(np.float64).ravel()
         print("Loaded homography from calibration.json")
     except Exception as e:
         print("Failed to load calibration:", e)
         homography = None
+        H = None
 
 if not NO_CALIBRATION:
     print("Running calibration first...")
@@ -74,30 +151,77 @@ else:
 
 # --- Pygame setup ---
 pygame.init()
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-WIDTH, HEIGHT = screen.get_size()
-pygame.display.set_caption("Eye Laser Game")
+# Everything is drawn from GPU textures through an SDL renderer. Prefer an
+# accelerated renderer with vsync so the display paces frames and clock.tick
+# only caps as a safety net; otherwise use SDL's software renderer with the
+# 60 fps pacer.
+window = Window("Eye Laser Game", size=pygame.display.get_desktop_sizes()[0],
+                fullscreen_desktop=True)
+try:
+    renderer = Renderer(window, accelerated=1, vsync=True)
+    FRAME_RATE_CAP = 120
+except SDLError:
+    renderer = Renderer(window, accelerated=0)
+    FRAME_RATE_CAP = 60
+WIDTH, HEIGHT = window.size
 clock = pygame.time.Clock()
 font = pygame.font.SysFont(None, 36)
+SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
 LASER_ORIGIN = (WIDTH // 2, HEIGHT)
 
+# Without a calibration, stretch the undistorted scene camera frame to the screen
+if H is not None:
+    GAZE_TO_SCREEN = H
+else:
+    GAZE_TO_SCREEN = np.array([WIDTH / SCENE_RESOLUTION[0], 0.0, 0.0,
+                               0.0, HEIGHT / SCENE_RESOLUTION[1], 0.0,
+                               0.0, 0.0, 1.0])
+
 # --- Load images ---
-background_img = pygame.image.load(BACKGROUND_IMAGE_FILE).convert()
+# Scaled once to their on-screen size and uploaded as textures
+background_img = pygame.image.load(BACKGROUND_IMAGE_FILE)
 background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT))
-asteroid_img = pygame.image.load(ASTEROID_IMAGE_FILE).convert_alpha()
+asteroid_img = pygame.image.load(ASTEROID_IMAGE_FILE)
 asteroid_img = pygame.transform.scale(asteroid_img, (ASTEROID_SIZE, ASTEROID_SIZE))
+BACKGROUND_TEX = Texture.from_surface(renderer, background_img)
+ASTEROID_TEX = Texture.from_surface(renderer, asteroid_img)
+
+# --- Pre-rendered fixation halos, one per integer growth radius ---
+def make_halo(color, radius):
+    halo_surface = pygame.Surface(
+        (FIXATION_HALO_MAX_RADIUS*2, FIXATION_HALO_MAX_RADIUS*2), pygame.SRCALPHA)
+    pygame.draw.circle(halo_surface, (*color, 100),
+                       (FIXATION_HALO_MAX_RADIUS, FIXATION_HALO_MAX_RADIUS), radius)
+    return Texture.from_surface(renderer, halo_surface)
+
+# indexed as HALO_TEX[is_good][radius]
+HALO_TEX = {
+    True: [make_halo((0, 255, 0), r) for r in range(FIXATION_HALO_MAX_RADIUS + 1)],
+    False: [make_halo((255, 0, 0), r) for r in range(FIXATION_HALO_MAX_RADIUS + 1)],
+}
 
 # --- Logging setup ---
 os.makedirs("logs", exist_ok=True)
 log_filename = time.strftime("logs/game_%Y%m%d_%H%M%S.csv")
-log_file = open(log_filename, "w", newline="", encoding="utf-8")
+log_file = open(log_filename, "w", buffering=8192, newline="", encoding="utf-8")
 log_writer = csv.writer(log_file)
 log_writer.writerow(["timestamp", "event", "details"])
 
+# Rows are collected here and written in batches by flush_log, so logging an
+# event inside the frame never touches the file.
+log_buffer = []
+
 def log_event(event, details=""):
-    log_writer.writerow([time.time(), event, details])
+    log_buffer.append((time.time(), event, details))
+
+def flush_log():
+    if log_buffer:
+        log_writer.writerows(log_buffer)
+        log_buffer.clear()
     log_file.flush()
 
+atexit.register(flush_log)
+
 # --- Pupil Labs init ---
 pl_device = None
 if not NO_EYETRACKING and discover_one_device:
@@ -109,95 +233,296 @@ if not NO_EYETRACKING and discover_one_device:
     else:
         print("No device found, falling back to mouse.")
 
-# --- Asteroid class ---
-class Asteroid:
-    def __init__(self, existing_asteroids, force_good=False):
-        valid = False
-        while not valid:
-            self.x = random.randint(ASTEROID_SIZE, WIDTH - ASTEROID_SIZE)
-            self.y = random.randint(ASTEROID_SIZE, HEIGHT - ASTEROID_SIZE)
-            self.rect = pygame.Rect(self.x, self.y, ASTEROID_SIZE, ASTEROID_SIZE)
-            valid = True
-            for other in existing_asteroids:
-                if math.hypot(self.rect.centerx - other.rect.centerx,
-                              self.rect.centery - other.rect.centery) < MIN_DISTANCE:
-                    valid = False
-                    break
-        self.fixating = False
-        self.start_fix = None
-        if force_good:
-            self.type = 'good'
-        else:
-            self.type = random.choice(['good', 'bad'])
-
-    def draw(self, screen):
-        screen.blit(asteroid_img, self.rect.topleft)
-        if self.fixating and self.start_fix is not None:
-            elapsed = time.time() - self.start_fix
+# --- Gaze producer thread ---
+# Reads and maps gaze at the device's own rate; the render loop only picks up
+# the most recent screen position, so a stalled stream never blocks a frame.
+GAZE_RECEIVE_TIMEOUT = 0.1  # seconds; bounds how long shutdown waits
+gaze_lock = threading.Lock()
+latest_gaze = [None]  # newest mapped (x, y) screen position, as ints
+gaze_stop = threading.Event()
+
+def gaze_worker():
+    # one-entry memo: a repeated raw sample maps to the same position, and an
+    # unchanged position needs no publishing
+    last_raw = last_pos = None
+    failing = False
+    # bound once as locals: this loop runs at the device's sample rate
+    receive, stopped = pl_device.receive_gaze_datum, gaze_stop.is_set
+    cam, dist, to_screen = CAMERA.cam, CAMERA.dist, GAZE_TO_SCREEN
+    while not stopped():
+        try:
+            gaze = receive(timeout_seconds=GAZE_RECEIVE_TIMEOUT)
+            if not gaze:
+                continue
+            raw = (gaze.x, gaze.y)
+            if raw == last_raw:
+                continue
+            gx, gy = map_gaze(gaze.x, gaze.y, cam, dist, to_screen)
+            # round once here; everything downstream takes int pixel coords
+            pos = (int(round(gx)), int(round(gy)))
+        except Exception as e:
+            # fall back to the mouse and retry after a pause; report only
+            # the first error of a run of failures
+            if not failing:
+                print("Gaze error:", e)
+                failing = True
+            last_raw = last_pos = None
+            with gaze_lock:
+                latest_gaze[0] = None
+            gaze_stop.wait(GAZE_RECEIVE_TIMEOUT)
+            continue
+        failing = False
+        last_raw = raw
+        if pos == last_pos:
+            continue
+        last_pos = pos
+        with gaze_lock:
+            latest_gaze[0] = pos
+
+gaze_thread = None
+if pl_device:
+    # compile (or load the cached) map_gaze now, not on the first live sample;
+    # mouse-only runs never map gaze and skip this
+    map_gaze(0.0, 0.0, CAMERA.cam, CAMERA.dist, GAZE_TO_SCREEN)
+    gaze_thread = threading.Thread(target=gaze_worker, daemon=True)
+    gaze_thread.start()
+
+# --- Asteroid placement ---
+# Fallback positions (top-left corners) spaced MIN_DISTANCE apart, used when
+# random placement keeps colliding on a crowded screen.
+SPAWN_GRID = np.array(
+    [(x, y)
+     for x in range(ASTEROID_SIZE, WIDTH - ASTEROID_SIZE + 1, MIN_DISTANCE)
+     for y in range(ASTEROID_SIZE, HEIGHT - ASTEROID_SIZE + 1, MIN_DISTANCE)],
+    dtype=np.float32).reshape(-1, 2)
+
+def find_spawn_position(taken):
+    # taken: (N, 2) top-left corners already on screen; squared distances
+    # between corners equal those between centers. All random candidates are
+    # tested in one broadcast and the first free one wins.
+    candidates = np.column_stack((
+        np.random.randint(ASTEROID_SIZE, WIDTH - ASTEROID_SIZE + 1, SPAWN_MAX_TRIES),
+        np.random.randint(ASTEROID_SIZE, HEIGHT - ASTEROID_SIZE + 1, SPAWN_MAX_TRIES),
+    )).astype(np.float32)
+    d2 = ((candidates[:, None, :] - taken[None, :, :]) ** 2).sum(axis=2)
+    ok = (d2 >= MIN_DISTANCE_SQ).all(axis=1)
+    if ok.any():
+        x, y = candidates[ok.argmax()]
+        return int(x), int(y)
+    d2 = ((SPAWN_GRID[:, None, :] - taken[None, :, :]) ** 2).sum(axis=2)
+    free = SPAWN_GRID[(d2 >= MIN_DISTANCE_SQ).all(axis=1)]
+    if len(free):
+        x, y = free[random.randrange(len(free))]
+        return int(x), int(y)
+    # screen is full: accept an overlapping position rather than spin forever
+    x, y = candidates[0]
+    return int(x), int(y)
+
+# --- Asteroid pool ---
+class AsteroidPool:
+    """Asteroid state kept as parallel arrays, one slot per asteroid.
+
+    Slots ``0..n-1`` are live; removal swaps the last live slot into the hole.
+    """
+
+    def __init__(self, capacity):
+        self.n = 0
+        self.x = np.zeros(capacity, dtype=np.int32)       # top-left corner
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.good = np.zeros(capacity, dtype=bool)
+        self.fixating = np.zeros(capacity, dtype=bool)
+        self.start_fix = np.zeros(capacity, dtype=np.int64)  # pygame ticks (ms)
+
+    def __len__(self):
+        return self.n
+
+    def topleft(self):
+        return np.stack([self.x[:self.n], self.y[:self.n]], axis=1).astype(np.float32)
+
+    def center(self, i):
+        return (int(self.x[i]) + ASTEROID_SIZE // 2, int(self.y[i]) + ASTEROID_SIZE // 2)
+
+    def spawn(self, force_good=False):
+        if self.n >= len(self.x):
+            return False
+        i = self.n
+        self.x[i], self.y[i] = find_spawn_position(self.topleft())
+        self.good[i] = True if force_good else random.choice([True, False])
+        self.fixating[i] = False
+        self.start_fix[i] = 0
+        self.n += 1
+        return True
+
+    def remove(self, i):
+        last = self.n - 1
+        for arr in (self.x, self.y, self.good, self.fixating, self.start_fix):
+            arr[i] = arr[last]
+        self.n = last
+
+    def update(self, cursor_pos, now):
+        """Advance fixation state; return indices of destroyed asteroids."""
+        n = self.n
+        cx, cy = cursor_pos
+        x, y = self.x[:n], self.y[:n]
+        inside = (x <= cx) & (cx < x + ASTEROID_SIZE) & (y <= cy) & (cy < y + ASTEROID_SIZE)
+        fixating = self.fixating[:n]
+        start_fix = self.start_fix[:n]
+        destroyed = inside & fixating & (now - start_fix >= FIXATION_TIME_MS)
+        start_fix[inside & ~fixating] = now
+        fixating[:] = inside
+        return np.flatnonzero(destroyed)
+
+    def draw(self, now):
+        """Draw live asteroids, then the halos of those being fixated."""
+        n = self.n
+        for i in range(n):
+            ASTEROID_TEX.draw(dstrect=(int(self.x[i]), int(self.y[i])))
+        for i in np.flatnonzero(self.fixating[:n]):
+            elapsed = now - self.start_fix[i]
             growth = min(FIXATION_HALO_MAX_RADIUS,
-                         int((elapsed / FIXATION_TIME) * FIXATION_HALO_MAX_RADIUS))
-            color = (0, 255, 0) if self.type == 'good' else (255, 0, 0)
-            halo_surface = pygame.Surface(
-                (FIXATION_HALO_MAX_RADIUS*2, FIXATION_HALO_MAX_RADIUS*2), pygame.SRCALPHA)
-            pygame.draw.circle(halo_surface, (*color, 100),
-                               (FIXATION_HALO_MAX_RADIUS, FIXATION_HALO_MAX_RADIUS), growth)
-            screen.blit(halo_surface, (self.rect.centerx - FIXATION_HALO_MAX_RADIUS,
-                                       self.rect.centery - FIXATION_HALO_MAX_RADIUS))
-
-    def update(self, cursor_pos):
-        if self.rect.collidepoint(cursor_pos):
-            if not self.fixating:
-                self.fixating = True
-                self.start_fix = time.time()
-            elif time.time() - self.start_fix >= FIXATION_TIME:
-                return True
-        else:
-            self.fixating = False
-            self.start_fix = None
-        return False
+                         int(elapsed) * FIXATION_HALO_MAX_RADIUS // FIXATION_TIME_MS)
+            HALO_TEX[bool(self.good[i])][growth].draw(
+                dstrect=(int(self.x[i]) + ASTEROID_SIZE // 2 - FIXATION_HALO_MAX_RADIUS,
+                         int(self.y[i]) + ASTEROID_SIZE // 2 - FIXATION_HALO_MAX_RADIUS))
 
 # --- Helpers ---
 def spawn_asteroids(asteroids, count):
     available_space = MAX_ON_SCREEN - len(asteroids)
     for _ in range(min(count, available_space)):
-        asteroids.append(Asteroid(asteroids))
-
-def draw_explosion(screen, position, radius=30):
-    pygame.draw.circle(screen, (255, 255, 0), position, radius)
-    pygame.draw.circle(screen, (255, 165, 0), position, radius//2)
+        asteroids.spawn()
+
+# Score/timer labels are composed from glyphs rendered once instead of
+# re-rasterizing the whole string every frame.
+TEXT_COLOR = (255, 255, 255)
+DIGIT_SURFS = [font.render(str(d), True, TEXT_COLOR) for d in range(10)]
+SCORE_PREFIX = font.render("Score: ", True, TEXT_COLOR)
+TIME_PREFIX = font.render("Time: ", True, TEXT_COLOR)
+TIME_SUFFIX = font.render("s", True, TEXT_COLOR)
+
+def render_number(n, prefix, suffix=None):
+    """Compose a label from the cached glyphs and upload it as a texture."""
+    parts = [prefix] + [DIGIT_SURFS[int(c)] for c in str(n)]
+    if suffix is not None:
+        parts.append(suffix)
+    label = pygame.Surface((sum(surf.get_width() for surf in parts), font.get_height()),
+                           pygame.SRCALPHA)
+    x = 0
+    for surf in parts:
+        label.blit(surf, (x, 0))
+        x += surf.get_width()
+    return Texture.from_surface(renderer, label)
+
+# Label textures by value; a score or time is only ever rendered once
+SCORE_LABELS = {}
+TIMER_LABELS = {}
+
+def cached_label(cache, n, prefix, suffix=None):
+    label = cache.get(n)
+    if label is None:
+        label = cache[n] = render_number(n, prefix, suffix)
+    return label
+
+# Explosions grow and fade over EXPLOSION_DURATION_MS; every animation frame is
+# pre-rendered at the same size, so drawing one is a single texture copy.
+EXPLOSION_RADIUS = 30
+EXPLOSION_DURATION_MS = 200
+EXPLOSION_FRAME_COUNT = 12  # one per frame at 60 Hz
+
+def make_explosion(step):
+    t = step / (EXPLOSION_FRAME_COUNT - 1)
+    radius = int(EXPLOSION_RADIUS * (0.5 + 0.5 * t))
+    alpha = int(255 * (1.0 - 0.6 * t))
+    surf = pygame.Surface((2 * EXPLOSION_RADIUS + 1, 2 * EXPLOSION_RADIUS + 1), pygame.SRCALPHA)
+    center = (EXPLOSION_RADIUS, EXPLOSION_RADIUS)
+    pygame.draw.circle(surf, (255, 255, 0, alpha), center, radius)
+    pygame.draw.circle(surf, (255, 165, 0, alpha), center, radius // 2)
+    return Texture.from_surface(renderer, surf)
+
+EXPLOSION_FRAMES = [make_explosion(step) for step in range(EXPLOSION_FRAME_COUNT)]
+EXPLOSION_SLOTS = 32
+
+class ExplosionRing:
+    """Fixed ring of explosion slots; a new explosion reuses the oldest slot."""
+
+    def __init__(self, capacity):
+        self.topleft = [None] * capacity
+        self.start = [None] * capacity  # pygame ticks, None when idle
+        self.next = 0
+
+    def add(self, center, now):
+        self.topleft[self.next] = (center[0] - EXPLOSION_RADIUS, center[1] - EXPLOSION_RADIUS)
+        self.start[self.next] = now
+        self.next = (self.next + 1) % len(self.start)
+
+    def draw(self, now):
+        for i, t0 in enumerate(self.start):
+            if t0 is None:
+                continue
+            age = now - t0
+            if age >= EXPLOSION_DURATION_MS:
+                self.start[i] = None
+                continue
+            frame = EXPLOSION_FRAMES[age * EXPLOSION_FRAME_COUNT // EXPLOSION_DURATION_MS]
+            frame.draw(dstrect=self.topleft[i])
+
+# The laser is one pre-rendered cross-section of the beam (glow, core and
+# centre line), stretched to the beam's length and rotated about the origin.
+LASER_GLOW_WIDTH = 15
+laser_section = pygame.Surface((1, LASER_GLOW_WIDTH), pygame.SRCALPHA)
+laser_section.fill((186, 85, 211, 80))
+laser_section.fill((148, 0, 211, 150), (0, (LASER_GLOW_WIDTH - 8) // 2, 1, 8))
+laser_section.fill((255, 200, 255), (0, (LASER_GLOW_WIDTH - 2) // 2, 1, 2))
+LASER_TEX = Texture.from_surface(renderer, laser_section)
+
+def draw_laser(end):
+    """Draw the laser from LASER_ORIGIN to ``end``."""
+    (x0, y0), (x1, y1) = LASER_ORIGIN, end
+    dx, dy = x1 - x0, y1 - y0
+    half = LASER_GLOW_WIDTH // 2
+    LASER_TEX.draw(dstrect=(x0, y0 - half, round(math.hypot(dx, dy)), LASER_GLOW_WIDTH),
+                   angle=math.degrees(math.atan2(dy, dx)), origin=(0, half))
 
 # --- Game Loop ---
-asteroids = [Asteroid([], force_good=True)]
+asteroids = AsteroidPool(MAX_ON_SCREEN)
+asteroids.spawn(force_good=True)
 score = 0
 running = True
 end_reason = "quit by user"
 
-laser_fixating = False
-laser_start_fix = None
-explosions = []
-EXPLOSION_DURATION = 0.2
+explosions = ExplosionRing(EXPLOSION_SLOTS)
 
-start_time = time.time()
+CURSOR_HALO_SIZE = 24
+cursor_surface = pygame.Surface((CURSOR_HALO_SIZE, CURSOR_HALO_SIZE), pygame.SRCALPHA)
+pygame.draw.circle(cursor_surface, (186, 85, 211, 80),
+                   (CURSOR_HALO_SIZE // 2, CURSOR_HALO_SIZE // 2), 10)
+pygame.draw.circle(cursor_surface, (148, 0, 211, 150),
+                   (CURSOR_HALO_SIZE // 2, CURSOR_HALO_SIZE // 2), 6)
+pygame.draw.circle(cursor_surface, (255, 200, 255),
+                   (CURSOR_HALO_SIZE // 2, CURSOR_HALO_SIZE // 2), 3)
+CURSOR_TEX = Texture.from_surface(renderer, cursor_surface)
+cursor_rect = CURSOR_TEX.get_rect()
 
-while running:
-    screen.blit(background_img, (0, 0))
+timer_label = None
 
-    # --- Get gaze or mouse ---
-    if pl_device:
-        gaze = pl_device.receive_gaze_datum()
-        if gaze and gaze.norm_pos:
-            gx = gaze.norm_pos[0] * WIDTH
-            gy = (1 - gaze.norm_pos[1]) * HEIGHT
+# Each asteroid disappears at random as a Poisson process, so with n on
+# screen the next disappearance is due after an exponentially distributed
+# number of asteroid-seconds; one countdown replaces a draw per asteroid.
+despawn_countdown = random.expovariate(ASTEROID_RANDOM_DISAPPEAR_RATE)
 
-            if homography is not None:
-                pt = np.array([[[gx, gy]]], dtype=np.float32)
-                mapped = cv2.perspectiveTransform(pt, homography)[0][0]
-                gx, gy = mapped
+start_ticks = pygame.time.get_ticks()
+last_log_flush = start_ticks
+clock.tick()  # reset so the first frame's dt excludes startup
 
-            cursor_pos = (int(gx), int(gy))
-        else:
-            cursor_pos = pygame.mouse.get_pos()
-    else:
+while running:
+    dt = clock.tick(FRAME_RATE_CAP) / 1000.0
+    now = pygame.time.get_ticks()  # one timestamp (ms) for everything in this frame
+
+    # --- Get gaze or mouse ---
+    cursor_pos = None
+    if gaze_thread:
+        with gaze_lock:
+            cursor_pos = latest_gaze[0]
+    if cursor_pos is None:
         cursor_pos = pygame.mouse.get_pos()
 
     # --- Events ---
@@ -214,92 +539,83 @@ while running:
         spawn_asteroids(asteroids, random.randint(MIN_ASTEROIDS, MAX_ASTEROIDS))
 
     # Update asteroids
-    for asteroid in asteroids[:]:
-        if random.random() < ASTEROID_RANDOM_DISAPPEAR_CHANCE:
-            asteroids.remove(asteroid)
-            continue
-
-        if asteroid.update(cursor_pos):
-            explosions.append((asteroid.rect.center, time.time()))
-            asteroids.remove(asteroid)
-            if asteroid.type == 'good':
-                score += 1
-                log_event("asteroid_destroyed_good", f"score={score}")
-            else:
-                score //= 2
-                log_event("asteroid_destroyed_bad", f"score={score}")
-                if score <= 0:
-                    running = False
-                    end_reason = "score <= 0"
-
-            if len(asteroids) == 0 or random.random() < SPAWN_PROBABILITY:
-                spawn_asteroids(asteroids, random.randint(MIN_ASTEROIDS, MAX_ASTEROIDS))
+    despawn_countdown -= len(asteroids) * dt
+    if despawn_countdown <= 0:
+        if len(asteroids):
+            asteroids.remove(random.randrange(len(asteroids)))
+        despawn_countdown = random.expovariate(ASTEROID_RANDOM_DISAPPEAR_RATE)
+
+    for i in asteroids.update(cursor_pos, now)[::-1]:
+        explosions.add(asteroids.center(i), now)
+        good = asteroids.good[i]
+        asteroids.remove(i)
+        if good:
+            score += 1
+            log_event("asteroid_destroyed_good", f"score={score}")
         else:
-            asteroid.draw(screen)
+            score //= 2
+            log_event("asteroid_destroyed_bad", f"score={score}")
+            if score <= 0:
+                running = False
+                end_reason = "score <= 0"
+
+        if len(asteroids) == 0 or random.random() < SPAWN_PROBABILITY:
+            spawn_asteroids(asteroids, random.randint(MIN_ASTEROIDS, MAX_ASTEROIDS))
 
     # --- Ensure not only bad asteroids for too long (3s) ---
     if asteroids:
-        if all(a.type == 'bad' for a in asteroids):
+        if not asteroids.good[:len(asteroids)].any():
             if only_bad_start_time is None:
-                only_bad_start_time = time.time()
-            elif time.time() - only_bad_start_time > 3:
+                only_bad_start_time = now
+            elif now - only_bad_start_time > ONLY_BAD_TIMEOUT_MS:
                 spawn_asteroids(asteroids, 1)
-                asteroids[-1].type = 'good'
+                asteroids.good[len(asteroids) - 1] = True
                 only_bad_start_time = None
         else:
             only_bad_start_time = None
 
-    # Explosions
-    for explosion in explosions[:]:
-        pos, t0 = explosion
-        if time.time() - t0 < EXPLOSION_DURATION:
-            draw_explosion(screen, pos)
-        else:
-            explosions.remove(explosion)
-
-    # Laser with glow
-    if not laser_fixating:
-        laser_fixating = True
-        laser_start_fix = time.time()
-    elif time.time() - laser_start_fix >= LASER_FIXATION_THRESHOLD:
-        laser_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        pygame.draw.line(laser_surface, (186, 85, 211, 80),
-                         LASER_ORIGIN, cursor_pos, 15)
-        pygame.draw.line(laser_surface, (148, 0, 211, 150),
-                         LASER_ORIGIN, cursor_pos, 8)
-        screen.blit(laser_surface, (0, 0))
-        pygame.draw.line(screen, (255, 200, 255, 220),
-                         LASER_ORIGIN, cursor_pos, 2)
-
-    # Cursor halo
-    cursor_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    pygame.draw.circle(cursor_surface, (186, 85, 211, 80), cursor_pos, 10)
-    pygame.draw.circle(cursor_surface, (148, 0, 211, 150), cursor_pos, 6)
-    screen.blit(cursor_surface, (0, 0))
-    pygame.draw.circle(screen, (255, 200, 255, 220), cursor_pos, 3)
-
     # Score & timer
-    screen.blit(font.render(f"Score: {score}", True, (255, 255, 255)), (10, 10))
+    score_label = cached_label(SCORE_LABELS, score, SCORE_PREFIX)
 
     if GAME_DURATION is not None:
-        elapsed_time = int(time.time() - start_time)
+        elapsed_time = (now - start_ticks) // 1000
         remaining_time = max(0, GAME_DURATION - elapsed_time)
-        screen.blit(font.render(f"Time: {remaining_time}s",
-                                True, (255, 255, 255)), (WIDTH - 150, 10))
+        timer_label = cached_label(TIMER_LABELS, remaining_time, TIME_PREFIX, TIME_SUFFIX)
         if remaining_time <= 0:
             running = False
             end_reason = "timer_finished"
 
-    pygame.display.flip()
-    clock.tick(60)
+    # --- Draw ---
+    BACKGROUND_TEX.draw()
+    asteroids.draw(now)
+    explosions.draw(now)
+    draw_laser(cursor_pos)
+    # gaze is not clamped to the screen; skip the cursor when looking past it
+    cursor_rect.center = cursor_pos
+    if cursor_rect.colliderect(SCREEN_RECT):
+        CURSOR_TEX.draw(dstrect=cursor_rect)
+    score_label.draw(dstrect=(10, 10))
+    if timer_label is not None:
+        timer_label.draw(dstrect=(WIDTH - 150, 10))
+    renderer.present()
+
+    if len(log_buffer) >= LOG_BATCH_ROWS or now - last_log_flush >= LOG_FLUSH_INTERVAL_MS:
+        flush_log()
+        last_log_flush = now
+
+if gaze_thread:
+    gaze_stop.set()
+    gaze_thread.join(timeout=1.0)
 
 # End game screen
-screen.fill((0, 0, 0))
-end_text = font.render(f"Game Over! Score: {score}", True, (255, 255, 255))
-text_rect = end_text.get_rect(center=(WIDTH//2, HEIGHT//2))
-screen.blit(end_text, text_rect)
-pygame.display.flip()
+renderer.draw_color = (0, 0, 0, 255)
+renderer.clear()
+end_text = Texture.from_surface(
+    renderer, font.render(f"Game Over! Score: {score}", True, (255, 255, 255)))
+end_text.draw(dstrect=end_text.get_rect(center=(WIDTH//2, HEIGHT//2)))
+renderer.present()
 log_event("END_REASON", end_reason)
+flush_log()
 time.sleep(3)
 
 pygame.quit()
@@ -4,10 +4,13 @@
 import pygame
 import random
 import time
-import math
-import sys
+import argparse
 import os
 import csv
+import atexit
+import threading
+
+import numpy as np
 
 # Pupil Labs
 try:
@@ -18,13 +21,17 @@ except ImportError:
 # --- Settings ---
 ASTEROID_SIZE = 64                # asteroid image size
 FIXATION_HALO_MAX_RADIUS = 80     # max radius of the fixation halo
-FIXATION_TIME = 1.0               # seconds of gaze to destroy
-LASER_FIXATION_THRESHOLD = 0.02   # seconds (20ms)
+FIXATION_TIME_MS = 1000           # ms of gaze to destroy
+ASTEROID_RADIUS = ASTEROID_SIZE // 2
+ASTEROID_RADIUS_SQ = ASTEROID_RADIUS * ASTEROID_RADIUS
 MIN_DISTANCE = ASTEROID_SIZE * 2  # minimum distance between asteroids
+MIN_DISTANCE_SQ = MIN_DISTANCE * MIN_DISTANCE
 MIN_ASTEROIDS = 1
 MAX_ASTEROIDS = 5
 MAX_ON_SCREEN = 8
 SPAWN_PROBABILITY = 0.5
+LOG_BATCH_ROWS = 64               # buffered log rows that force a write
+LOG_FLUSH_INTERVAL_MS = 1000      # ms between log writes otherwise
 ASTEROID_RANDOM_DISAPPEAR_CHANCE = 0.001
 
 # Glasses field of view resolution (adjust to your device)
@@ -36,15 +43,15 @@ BACKGROUND_IMAGE_FILE = os.path.join("visuals", "background.png")
 ASTEROID_IMAGE_FILE = os.path.join("visuals", "asteroid.png")
 
 # --- Command-line arguments ---
-GAME_DURATION = None
-NO_EYETRACKING = "--no-eyetracking" in sys.argv
-WINDOWED = "--windowed" in sys.argv
+parser = argparse.ArgumentParser()
+parser.add_argument("--timer", type=int, default=None, help="Game duration in seconds")
+parser.add_argument("--no-eyetracking", action="store_true", help="Use the mouse instead of gaze")
+parser.add_argument("--windowed", action="store_true", help="Run in a 1280x720 window")
+args = parser.parse_args()
 
-if "--timer" in sys.argv:
-    try:
-        GAME_DURATION = int(sys.argv[sys.argv.index("--timer") + 1])
-    except Exception:
-        GAME_DURATION = None
+GAME_DURATION = args.timer
+NO_EYETRACKING = args.no_eyetracking
+WINDOWED = args.windowed
 
 pygame.init()
 # Fullscreen or windowed mode
@@ -59,22 +66,58 @@ font = pygame.font.SysFont(None, 36)
 LASER_ORIGIN = (WIDTH // 2, HEIGHT)
 
 # --- Load images ---
-background_img = pygame.image.load(BACKGROUND_IMAGE_FILE).convert()
-background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT))
-asteroid_img = pygame.image.load(ASTEROID_IMAGE_FILE).convert_alpha()
-asteroid_img = pygame.transform.scale(asteroid_img, (ASTEROID_SIZE, ASTEROID_SIZE))
+# Convert *after* scaling: the scaled copy is what gets blitted every frame and
+# must already be in display format (opaque background, per-pixel alpha only
+# for the asteroid).
+background_img = pygame.image.load(BACKGROUND_IMAGE_FILE)
+background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT)).convert()
+asteroid_img = pygame.image.load(ASTEROID_IMAGE_FILE)
+asteroid_img = pygame.transform.scale(asteroid_img, (ASTEROID_SIZE, ASTEROID_SIZE)).convert_alpha()
+
+# --- Pre-rendered fixation rings, one per integer radius ---
+def make_halo(radius):
+    halo = pygame.Surface((radius * 2 + 2, radius * 2 + 2), pygame.SRCALPHA)
+    pygame.draw.circle(halo, (0, 255, 0), (radius + 1, radius + 1), radius, 3)
+    return halo.convert_alpha()
+
+HALOS = [make_halo(r) for r in range(FIXATION_HALO_MAX_RADIUS + 1)]
+
+# --- Score text, rendered once per value ---
+SCORE_TEXTS = {}
+
+def score_text(score):
+    text = SCORE_TEXTS.get(score)
+    if text is None:
+        text = SCORE_TEXTS[score] = font.render(
+            f"Score: {score}", True, (255, 255, 255)).convert_alpha()
+    return text
 
 # --- Logging setup ---
 os.makedirs("logs", exist_ok=True)
 log_filename = time.strftime("logs/game_%Y%m%d_%H%M%S.csv")
-log_file = open(log_filename, "w", newline="", encoding="utf-8")
+log_file = open(log_filename, "w", buffering=8192, newline="", encoding="utf-8")
 log_writer = csv.writer(log_file)
 log_writer.writerow(["timestamp", "event", "details"])
 
-def log_event(event, details=""):
-    log_writer.writerow([time.time(), event, details])
+# Rows are collected here and written in batches by flush_log
+log_buffer = []
+
+def log_event(event, details="", timestamp=None):
+    log_buffer.append((time.time() if timestamp is None else timestamp, event, details))
+
+def flush_log():
+    if log_buffer:
+        log_writer.writerows(log_buffer)
+        log_buffer.clear()
     log_file.flush()
 
+def close_log():
+    if not log_file.closed:
+        flush_log()
+        log_file.close()
+
+atexit.register(close_log)
+
 # --- Pupil Labs init ---
 pl_device = None
 if not NO_EYETRACKING and discover_one_device:
@@ -88,31 +131,127 @@ if not NO_EYETRACKING and discover_one_device:
 else:
     print("No eyetracking (mouse control).")
 
-# --- Asteroid class ---
-class Asteroid:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = ASTEROID_SIZE // 2
-        self.spawn_time = time.time()
-        self.fixation_time = 0
-        self.hit = False
+# --- Gaze producer thread ---
+# Reads and maps gaze at the device's own rate; the render loop only picks up
+# the most recent screen position, so a stalled stream never blocks a frame.
+GAZE_RECEIVE_TIMEOUT = 0.1  # seconds; bounds how long shutdown waits
+gaze_lock = threading.Lock()
+latest_gaze = [None]  # newest mapped (x, y) screen position
+gaze_stop = threading.Event()
+
+def gaze_worker():
+    # a datum handed out again keeps its timestamp and needs no remapping;
+    # an unchanged position needs no publishing
+    last_ts = last_pos = None
+    failing = False
+    # bound once as locals: this loop runs at the device's sample rate
+    receive, stopped = pl_device.receive_gaze_datum, gaze_stop.is_set
+    scale_x, scale_y = WIDTH / GLASSES_WIDTH, HEIGHT / GLASSES_HEIGHT
+    max_x, max_y = WIDTH - 1, HEIGHT - 1
+    while not stopped():
+        try:
+            gaze_sample = receive(timeout_seconds=GAZE_RECEIVE_TIMEOUT)
+            if gaze_sample is None or not hasattr(gaze_sample, "x") or not hasattr(gaze_sample, "y"):
+                continue
+            ts = getattr(gaze_sample, "timestamp_unix_seconds", None)
+            if ts is not None and ts == last_ts:
+                continue
+            # Map glasses coordinates to game window
+            mapped_x = max(0, min(max_x, int(gaze_sample.x * scale_x)))
+            mapped_y = max(0, min(max_y, int(gaze_sample.y * scale_y)))
+        except Exception as e:
+            # fall back to the mouse and retry after a pause; report only
+            # the first error of a run of failures
+            if not failing:
+                print("Gaze error:", e)
+                failing = True
+            last_ts = last_pos = None
+            with gaze_lock:
+                latest_gaze[0] = None
+            gaze_stop.wait(GAZE_RECEIVE_TIMEOUT)
+            continue
+        failing = False
+        last_ts = ts
+        pos = (mapped_x, mapped_y)
+        if pos == last_pos:
+            continue
+        last_pos = pos
+        with gaze_lock:
+            latest_gaze[0] = pos
+
+gaze_thread = None
+if pl_device and not NO_EYETRACKING:
+    gaze_thread = threading.Thread(target=gaze_worker, daemon=True)
+    gaze_thread.start()
+
+# --- Asteroid pool ---
+class AsteroidPool:
+    """Asteroid centers and fixation times kept as parallel arrays.
+
+    Slots ``0..n-1`` are live; ``keep`` compacts the survivors to the front.
+    """
+
+    def __init__(self, capacity):
+        self.n = 0
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.fixation_time = np.zeros(capacity, dtype=np.int64)  # ms
+
+    def __len__(self):
+        return self.n
+
+    def spawn(self, x, y):
+        i = self.n
+        self.x[i], self.y[i] = x, y
+        self.fixation_time[i] = 0
+        self.n += 1
+
+    def is_clear(self, x, y):
+        """True if (x, y) is at least MIN_DISTANCE from every live asteroid."""
+        dx = self.x[:self.n] - x
+        dy = self.y[:self.n] - y
+        return bool((dx * dx + dy * dy >= MIN_DISTANCE_SQ).all())
+
+    def keep(self, mask):
+        """Drop the live slots where ``mask`` is False, preserving order."""
+        n = int(np.count_nonzero(mask))
+        for arr in (self.x, self.y, self.fixation_time):
+            arr[:n] = arr[:self.n][mask]
+        self.n = n
+
+    def update(self, cursor_pos, dt_ms):
+        """Accumulate fixation time under the cursor; return the hit mask."""
+        n = self.n
+        dx = self.x[:n] - cursor_pos[0]
+        dy = self.y[:n] - cursor_pos[1]
+        hit = dx * dx + dy * dy < ASTEROID_RADIUS_SQ
+        fixation_time = self.fixation_time[:n]
+        fixation_time[hit] += dt_ms
+        fixation_time[~hit] = 0
+        return hit
 
     def draw(self, screen):
-        screen.blit(asteroid_img, (self.x - self.radius, self.y - self.radius))
+        """Blit every live asteroid; return the rects they cover."""
+        return screen.blits([(asteroid_img, (int(self.x[i]) - ASTEROID_RADIUS,
+                                             int(self.y[i]) - ASTEROID_RADIUS))
+                             for i in range(self.n)])
 
 # --- Game state ---
-asteroids = []
+asteroids = AsteroidPool(MAX_ON_SCREEN)
 score = 0
 running = True
-start_time = time.time()
+start_time = time.time()  # wall clock, for log timestamps
+start_ticks = pygame.time.get_ticks()
 cursor_pos = (WIDTH // 2, HEIGHT // 2)
 end_reason = "QUIT"
+last_log_flush = start_ticks
+drawn_state = None  # what the screen currently shows; None forces a full repaint
+drawn_rects = []    # rects covered by last redraw's foreground
 
 # --- Main loop ---
 while running:
-    dt = clock.tick(60) / 1000.0
-    screen.blit(background_img, (0, 0))
+    dt_ms = clock.tick(60)
+    now = pygame.time.get_ticks()  # one timestamp (ms) for everything in this frame
 
     # --- Handle events ---
     for event in pygame.event.get():
@@ -123,66 +262,76 @@ while running:
             if event.key == pygame.K_ESCAPE:
                 running = False
                 end_reason = "ESC"
+        elif event.type == pygame.WINDOWEXPOSED:
+            drawn_state = None
 
     # --- Get cursor position from eyetracker or mouse ---
-    if pl_device and not NO_EYETRACKING:
-        try:
-            gaze_sample = pl_device.receive_gaze_datum()
-            if gaze_sample is not None and hasattr(gaze_sample, "x") and hasattr(gaze_sample, "y"):
-                # Map glasses coordinates to game window
-                mapped_x = int(gaze_sample.x / GLASSES_WIDTH * WIDTH)
-                mapped_y = int(gaze_sample.y / GLASSES_HEIGHT * HEIGHT)
-                mapped_x = max(0, min(WIDTH - 1, mapped_x))
-                mapped_y = max(0, min(HEIGHT - 1, mapped_y))
-                cursor_pos = (mapped_x, mapped_y)
-            else:
-                cursor_pos = pygame.mouse.get_pos()
-        except Exception as e:
-            print("Gaze error:", e)
-            cursor_pos = pygame.mouse.get_pos()
-    else:
+    cursor_pos = None
+    if gaze_thread:
+        with gaze_lock:
+            cursor_pos = latest_gaze[0]
+    if cursor_pos is None:
         cursor_pos = pygame.mouse.get_pos()
 
     # --- Spawn asteroids ---
     if len(asteroids) < MAX_ON_SCREEN and random.random() < SPAWN_PROBABILITY:
         x = random.randint(ASTEROID_SIZE, WIDTH - ASTEROID_SIZE)
         y = random.randint(ASTEROID_SIZE, HEIGHT // 2)
-        asteroids.append(Asteroid(x, y))
-
-    # --- Draw asteroids and handle fixation ---
-    for asteroid in asteroids[:]:
-        asteroid.draw(screen)
-        dist = math.hypot(cursor_pos[0] - asteroid.x, cursor_pos[1] - asteroid.y)
-        if dist < asteroid.radius:
-            asteroid.fixation_time += dt
-            halo_radius = int((asteroid.fixation_time / FIXATION_TIME) * FIXATION_HALO_MAX_RADIUS)
-            pygame.draw.circle(screen, (0, 255, 0), cursor_pos, halo_radius, 3)
-            if asteroid.fixation_time >= FIXATION_TIME:
-                asteroids.remove(asteroid)
-                score += 1
-                log_event("ASTEROID_DESTROYED", f"score={score}")
-        else:
-            asteroid.fixation_time = 0
+        # a crowded candidate is dropped; the next frame draws a new one
+        if asteroids.is_clear(x, y):
+            asteroids.spawn(x, y)
 
-    # --- Draw laser ---
-    pygame.draw.line(screen, (255, 0, 0), LASER_ORIGIN, cursor_pos, 2)
+    # --- Handle fixation ---
+    hit = asteroids.update(cursor_pos, dt_ms)
+    halo_radii = tuple(
+        min(FIXATION_HALO_MAX_RADIUS,
+            int(asteroids.fixation_time[i]) * FIXATION_HALO_MAX_RADIUS // FIXATION_TIME_MS)
+        for i in np.flatnonzero(hit))
+    destroyed = asteroids.fixation_time[:len(asteroids)] >= FIXATION_TIME_MS
+    if destroyed.any():
+        asteroids.keep(~destroyed)
+        frame_time = start_time + (now - start_ticks) / 1000.0
+        for _ in range(np.count_nonzero(destroyed)):
+            score += 1
+            log_event("ASTEROID_DESTROYED", f"score={score}", frame_time)
 
-    # --- Draw score ---
-    score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(score_text, (10, 10))
+    # --- Draw, unless the frame would look exactly like the last one ---
+    # Asteroids never move: spawns raise the count and every removal changes
+    # the score, so this tuple covers everything on screen.
+    frame_state = (cursor_pos, len(asteroids), score, halo_radii)
+    if frame_state != drawn_state:
+        # Only the background under last redraw's foreground is restored and
+        # only the old and new foreground rects are sent to the display.
+        if drawn_state is None:
+            restored = [screen.blit(background_img, (0, 0))]
+        else:
+            restored = screen.blits([(background_img, r, r) for r in drawn_rects])
+        drawn_state = frame_state
+        drawn_rects = asteroids.draw(screen)
+        for halo_radius in halo_radii:
+            halo = HALOS[halo_radius]
+            drawn_rects.append(screen.blit(halo, halo.get_rect(center=cursor_pos)))
+        drawn_rects.append(pygame.draw.line(screen, (255, 0, 0), LASER_ORIGIN, cursor_pos, 2))
+        drawn_rects.append(screen.blit(score_text(score), (10, 10)))
+        pygame.display.update(restored + drawn_rects)
 
     # --- Check timer ---
-    if GAME_DURATION and (time.time() - start_time) >= GAME_DURATION:
+    if GAME_DURATION and now - start_ticks >= GAME_DURATION * 1000:
         running = False
         end_reason = "TIMER"
 
-    pygame.display.flip()
+    if len(log_buffer) >= LOG_BATCH_ROWS or now - last_log_flush >= LOG_FLUSH_INTERVAL_MS:
+        flush_log()
+        last_log_flush = now
 
 # --- Cleanup ---
+if gaze_thread:
+    gaze_stop.set()
+    gaze_thread.join(timeout=1.0)
 end_time = time.time()
 game_duration = end_time - start_time
 log_event("GAME_END", f"reason={end_reason}, duration={game_duration:.2f}s, score={score}")
-log_file.close()
+close_log()
 if pl_device:
     pl_device.recording_stop_and_save()
     pl_device.close()